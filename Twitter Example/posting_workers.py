@@ -0,0 +1,470 @@
+#!/usr/bin/env python3
+"""
+Sharded Posting Workers
+This module runs tweet posting across several processes sharing one SQLite
+database file. Jobs are partitioned by account and each account is leased to
+a single worker at a time.
+
+All workers must run on the same host as the database file: leases rely on
+SQLite file locking and on every worker's time.time() agreeing, and neither
+holds across machines. Running workers on several hosts is not supported.
+"""
+
+import json
+import multiprocessing
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+
+from twitter_bot import TwitterBot
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    account     TEXT NOT NULL,
+    text        TEXT NOT NULL,
+    image_paths TEXT NOT NULL DEFAULT '[]',
+    status      TEXT NOT NULL DEFAULT 'pending',
+    worker      TEXT,
+    tweet_id    TEXT,
+    created_at  REAL NOT NULL,
+    updated_at  REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_account_status ON jobs (account, status, id);
+CREATE TABLE IF NOT EXISTS leases (
+    account    TEXT PRIMARY KEY,
+    worker     TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS seen (
+    account   TEXT NOT NULL,
+    digest    TEXT NOT NULL,
+    signature TEXT,
+    posted_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS seen_account_posted ON seen (account, posted_at);
+"""
+
+
+class PostingQueue:
+    def __init__(self, db_path):
+        """Open (and create if needed) the shared job database"""
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def _transaction(self):
+        """Start a write transaction so lease checks and updates are atomic"""
+        self.conn.execute("BEGIN IMMEDIATE")
+
+    def add_job(self, account, text, image_paths=None):
+        """Queue a tweet for an account and return the job ID"""
+        now = time.time()
+        cursor = self.conn.execute(
+            "INSERT INTO jobs (account, text, image_paths, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+            (account, text, json.dumps(image_paths or []), now, now)
+        )
+        return cursor.lastrowid
+
+    def pending_accounts(self, now=None):
+        """Return accounts with queued work that are not leased by a live worker"""
+        now = time.time() if now is None else now
+        rows = self.conn.execute(
+            """
+            SELECT DISTINCT j.account FROM jobs j
+            LEFT JOIN leases l ON l.account = j.account
+            WHERE j.status IN ('pending', 'running') AND (l.account IS NULL OR l.expires_at < ?)
+            """,
+            (now,)
+        ).fetchall()
+        return [row["account"] for row in rows]
+
+    def has_pending_jobs(self):
+        row = self.conn.execute(
+            "SELECT 1 FROM jobs WHERE status IN ('pending', 'running') LIMIT 1"
+        ).fetchone()
+        return row is not None
+
+    def acquire_lease(self, account, worker_id, lease_seconds):
+        """Take or renew the lease on an account; returns True if this worker owns it"""
+        now = time.time()
+        self._transaction()
+        try:
+            self.conn.execute(
+                "INSERT OR IGNORE INTO leases (account, worker, expires_at) VALUES (?, ?, ?)",
+                (account, worker_id, now + lease_seconds)
+            )
+            cursor = self.conn.execute(
+                "UPDATE leases SET worker = ?, expires_at = ? WHERE account = ? AND (worker = ? OR expires_at < ?)",
+                (worker_id, now + lease_seconds, account, worker_id, now)
+            )
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return cursor.rowcount == 1
+
+    def release_lease(self, account, worker_id):
+        self.conn.execute(
+            "DELETE FROM leases WHERE account = ? AND worker = ?",
+            (account, worker_id)
+        )
+
+    def claim_next_job(self, account, worker_id):
+        """Claim the oldest queued job for an account this worker holds the lease on
+
+        Jobs left 'running' by a worker whose lease expired are claimed again,
+        so a tweet may be retried if its worker died right after posting it.
+        """
+        now = time.time()
+        self._transaction()
+        try:
+            lease = self.conn.execute(
+                "SELECT 1 FROM leases WHERE account = ? AND worker = ? AND expires_at >= ?",
+                (account, worker_id, now)
+            ).fetchone()
+            if lease is None:
+                self.conn.execute("COMMIT")
+                return None
+
+            job = self.conn.execute(
+                """
+                SELECT * FROM jobs
+                WHERE account = ? AND (status = 'pending' OR (status = 'running' AND worker != ?))
+                ORDER BY id LIMIT 1
+                """,
+                (account, worker_id)
+            ).fetchone()
+            if job is not None:
+                self.conn.execute(
+                    "UPDATE jobs SET status = 'running', worker = ?, updated_at = ? WHERE id = ?",
+                    (worker_id, now, job["id"])
+                )
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+
+        if job is None:
+            return None
+        job = dict(job)
+        job["image_paths"] = json.loads(job["image_paths"])
+        return job
+
+    def finish_job(self, job, worker_id, status, tweet_id=None, fingerprint=None):
+        """Record a job's result as 'done', 'skipped' or 'failed'
+
+        The fingerprint of a posted text is added to the account's shared
+        dedup history even if the lease was lost meanwhile, since the tweet
+        went out either way.
+        Returns (lease_held, recorded): recorded is False when another worker
+        has re-claimed the job.
+        """
+        now = time.time()
+        self._transaction()
+        try:
+            lease = self.conn.execute(
+                "SELECT 1 FROM leases WHERE account = ? AND worker = ? AND expires_at >= ?",
+                (job["account"], worker_id, now)
+            ).fetchone()
+            cursor = self.conn.execute(
+                "UPDATE jobs SET status = ?, tweet_id = ?, updated_at = ? WHERE id = ? AND worker = ?",
+                (status, tweet_id, now, job["id"], worker_id)
+            )
+            if status == "done" and fingerprint is not None:
+                digest, signature = fingerprint
+                self.conn.execute(
+                    "INSERT INTO seen (account, digest, signature, posted_at) VALUES (?, ?, ?, ?)",
+                    (job["account"], digest, None if signature is None else json.dumps(signature), now)
+                )
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return lease is not None, cursor.rowcount == 1
+
+    def seen_fingerprints(self, account, since):
+        """Return (posted_at, fingerprint) for an account's tweets posted after since, oldest first"""
+        self.conn.execute("DELETE FROM seen WHERE account = ? AND posted_at < ?", (account, since))
+        rows = self.conn.execute(
+            "SELECT posted_at, digest, signature FROM seen WHERE account = ? AND posted_at >= ? ORDER BY posted_at",
+            (account, since)
+        ).fetchall()
+        return [
+            (row["posted_at"], (row["digest"], None if row["signature"] is None else json.loads(row["signature"])))
+            for row in rows
+        ]
+
+    def counts(self):
+        """Return the number of jobs in each status"""
+        rows = self.conn.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+        return {row["status"]: row["n"] for row in rows}
+
+
+def default_bot_factory(account):
+    """Create the bot used for an account; replace to load per-account credentials
+
+    The bot's dedup index is reloaded from the shared database whenever the
+    worker takes an account's lease, so do not give it a JSON path here.
+    """
+    return TwitterBot()
+
+
+class _LeaseHeartbeat(threading.Thread):
+    """Keep renewing an account's lease while the worker is busy posting"""
+
+    def __init__(self, db_path, account, worker_id, lease_seconds):
+        super().__init__(daemon=True)
+        self.db_path = db_path
+        self.account = account
+        self.worker_id = worker_id
+        self.lease_seconds = lease_seconds
+        self.lost = False
+        self._stop_event = threading.Event()
+
+    def run(self):
+        # SQLite connections cannot be shared between threads, so use our own
+        queue = PostingQueue(self.db_path)
+        try:
+            while not self._stop_event.wait(self.lease_seconds / 3):
+                try:
+                    if not queue.acquire_lease(self.account, self.worker_id, self.lease_seconds):
+                        self.lost = True
+                        return
+                except sqlite3.Error as e:
+                    print(f"⚠️  Warning: Could not renew lease for {self.account}: {e}")
+        finally:
+            queue.close()
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+class PostingWorker:
+    def __init__(self, db_path, worker_id=None, bot_factory=default_bot_factory,
+                 lease_seconds=60, batch_size=20, poll_interval=1.0, finish_retries=5):
+        """Initialize a worker that posts queued tweets from the shared database
+
+        lease_seconds  -- how long an account stays owned without a renewal
+        batch_size     -- jobs posted for one account before its lease is released
+        poll_interval  -- seconds to sleep when there is no unleased work
+        finish_retries -- attempts to record a job's result before giving up
+        """
+        self.db_path = db_path
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.bot_factory = bot_factory
+        self.lease_seconds = lease_seconds
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.finish_retries = finish_retries
+        self.bots = {}
+
+    def _get_bot(self, account):
+        if account not in self.bots:
+            self.bots[account] = self.bot_factory(account)
+        return self.bots[account]
+
+    def _load_history(self, queue, bot, account):
+        """Replace the bot's dedup history with the account's shared history"""
+        index = bot.dedup_index
+        index.clear()
+        for posted_at, fingerprint in queue.seen_fingerprints(account, time.time() - index.window_seconds):
+            index.add_fingerprint(fingerprint, now=posted_at)
+
+    def _post(self, bot, job):
+        """Post one job with the matching TwitterBot method
+
+        Returns (status, tweet_id, fingerprint); text tweets are checked
+        against the dedup index here so a skip is not reported as a failure.
+        """
+        image_paths = job["image_paths"]
+        fingerprint = None
+        if not image_paths:
+            text = bot.fit_text(job["text"])
+            fingerprint = bot.dedup_index.fingerprint(text)
+            reason, similarity = bot.dedup_index.check_fingerprint(fingerprint)
+            if reason:
+                print(f"⏭️  Skipping job {job['id']}, {reason} duplicate (similarity {similarity:.2f})")
+                return "skipped", None, None
+            response = bot.post_text_tweet(text, allow_duplicate=True)
+        elif len(image_paths) == 1:
+            response = bot.post_tweet_with_image(job["text"], image_paths[0])
+        else:
+            response = bot.post_tweet_with_multiple_images(job["text"], image_paths)
+
+        if response is None:
+            return "failed", None, None
+        return "done", str(response.data['id']), fingerprint
+
+    def _finish_job(self, queue, job, status, tweet_id, fingerprint):
+        """Record a job's result, retrying database errors
+
+        Returns finish_job's (lease_held, recorded), or None if every attempt
+        failed.
+        """
+        for attempt in range(1, self.finish_retries + 1):
+            try:
+                return queue.finish_job(job, self.worker_id, status, tweet_id, fingerprint)
+            except sqlite3.Error as e:
+                print(f"⚠️  Warning: Could not record job {job['id']} (attempt {attempt}/{self.finish_retries}): {e}")
+                time.sleep(self.poll_interval)
+        return None
+
+    def process_account(self, queue, account):
+        """Post up to batch_size jobs for an account while holding its lease
+
+        A heartbeat thread renews the lease while a post is in flight, so a
+        slow media upload does not let another worker take the account.
+        """
+        posted = 0
+        release = True
+        heartbeat = _LeaseHeartbeat(self.db_path, account, self.worker_id, self.lease_seconds)
+        heartbeat.start()
+        try:
+            try:
+                bot = self._get_bot(account)
+                self._load_history(queue, bot, account)
+            except Exception as e:
+                print(f"❌ Error setting up bot for {account}: {e}")
+                bot = None
+
+            while posted < self.batch_size and not heartbeat.lost:
+                job = queue.claim_next_job(account, self.worker_id)
+                if job is None:
+                    break
+
+                status, tweet_id, fingerprint = "failed", None, None
+                if bot is not None:
+                    try:
+                        status, tweet_id, fingerprint = self._post(bot, job)
+                    except Exception as e:
+                        print(f"❌ Error posting job {job['id']} for {account}: {e}")
+
+                result = self._finish_job(queue, job, status, tweet_id, fingerprint)
+                if result is None:
+                    # Keep the lease until it expires rather than letting another
+                    # worker re-claim a job whose tweet may already be posted
+                    print(f"❌ Error: Result {status} of job {job['id']} was not recorded, holding {account} until its lease expires")
+                    release = False
+                    break
+
+                lease_held, recorded = result
+                if not lease_held:
+                    print(f"⚠️  Warning: Lease on {account} was lost while posting job {job['id']}")
+                if not recorded:
+                    print(f"⚠️  Warning: Job {job['id']} was re-claimed by another worker, result {status} not recorded")
+                if not lease_held or not recorded:
+                    break
+                posted += 1
+        finally:
+            heartbeat.stop()
+            if release:
+                try:
+                    queue.release_lease(account, self.worker_id)
+                except sqlite3.Error as e:
+                    print(f"⚠️  Warning: Could not release lease on {account}, it will expire: {e}")
+        return posted
+
+    def run(self, stop_when_idle=True):
+        """Process accounts until the queue is empty (or forever)"""
+        queue = PostingQueue(self.db_path)
+        print(f"👷 Worker {self.worker_id} started")
+        total = 0
+        try:
+            while True:
+                accounts = queue.pending_accounts()
+                # Start at a worker-specific offset so workers spread across accounts
+                if accounts:
+                    offset = hash(self.worker_id) % len(accounts)
+                    accounts = accounts[offset:] + accounts[:offset]
+
+                worked = False
+                for account in accounts:
+                    try:
+                        if queue.acquire_lease(account, self.worker_id, self.lease_seconds):
+                            total += self.process_account(queue, account)
+                            worked = True
+                    except sqlite3.Error as e:
+                        print(f"❌ Database error while processing {account}: {e}")
+                        worked = True
+
+                if not worked:
+                    if stop_when_idle and not queue.has_pending_jobs():
+                        break
+                    time.sleep(self.poll_interval)
+        finally:
+            queue.close()
+        print(f"✅ Worker {self.worker_id} finished, {total} jobs processed")
+        return total
+
+
+def _run_worker(db_path, bot_factory, lease_seconds, batch_size, stop_when_idle):
+    PostingWorker(
+        db_path,
+        bot_factory=bot_factory,
+        lease_seconds=lease_seconds,
+        batch_size=batch_size
+    ).run(stop_when_idle=stop_when_idle)
+
+
+def run_workers(db_path, num_workers=None, bot_factory=default_bot_factory,
+                lease_seconds=60, batch_size=20, stop_when_idle=True):
+    """Run num_workers worker processes (one per core by default) and wait for them
+
+    Returns True if every worker exited cleanly.
+    """
+    num_workers = num_workers or os.cpu_count() or 1
+    PostingQueue(db_path).close()
+
+    processes = [
+        multiprocessing.Process(
+            target=_run_worker,
+            args=(db_path, bot_factory, lease_seconds, batch_size, stop_when_idle)
+        )
+        for _ in range(num_workers)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+    failed = [process for process in processes if process.exitcode != 0]
+    for process in failed:
+        print(f"❌ Worker process {process.pid} exited with code {process.exitcode}")
+    return not failed
+
+
+def main():
+    """Run local workers against a shared job database"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run sharded tweet posting workers")
+    parser.add_argument("db_path", help="SQLite database shared by all workers")
+    parser.add_argument("-n", "--workers", type=int, default=None, help="number of processes (default: CPU count)")
+    parser.add_argument("--lease-seconds", type=int, default=60)
+    parser.add_argument("--batch-size", type=int, default=20)
+    parser.add_argument("--forever", action="store_true", help="keep polling after the queue is empty")
+    args = parser.parse_args()
+
+    print("🐦 Starting posting workers...")
+    print("=" * 50)
+    if not run_workers(
+        args.db_path,
+        num_workers=args.workers,
+        lease_seconds=args.lease_seconds,
+        batch_size=args.batch_size,
+        stop_when_idle=not args.forever
+    ):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
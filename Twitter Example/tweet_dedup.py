@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Tweet Duplicate Detection Index
+This module keeps a local index of recently posted tweet texts so exact and
+near-duplicate tweets can be dropped before they reach the Twitter API
+"""
+
+import hashlib
+import json
+import os
+import random
+import time
+import unicodedata
+from collections import deque
+
+# Large Mersenne prime used for the MinHash permutations
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+
+class TweetDedupIndex:
+    def __init__(self, window_seconds=7 * 24 * 3600, num_perm=64, bands=16,
+                 near_threshold=None, shingle_size=5, path=None):
+        """Initialize the index
+
+        window_seconds  -- how long a posted text is remembered
+        num_perm        -- number of MinHash permutations per signature
+        bands           -- number of LSH bands (num_perm must divide evenly)
+        near_threshold  -- estimated Jaccard similarity treated as a duplicate;
+                           None (the default) only blocks exact duplicates.
+                           Keep it high (0.95 or more) so series posts such
+                           as "Day 1 ..." / "Day 2 ..." are not blocked
+        shingle_size    -- character shingle length used for MinHash
+        path            -- optional JSON file used to persist the index
+        """
+        if num_perm % bands != 0:
+            raise ValueError("num_perm must be a multiple of bands")
+
+        self.window_seconds = window_seconds
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.near_threshold = near_threshold
+        self.shingle_size = shingle_size
+        self.path = path
+
+        # Fixed seed so signatures stay comparable across runs and processes
+        rng = random.Random(1)
+        self._perms = [
+            (rng.randint(1, _MERSENNE_PRIME - 1), rng.randint(0, _MERSENNE_PRIME - 1))
+            for _ in range(num_perm)
+        ]
+
+        self._exact = {}        # digest -> entry id
+        self._entries = {}      # entry id -> (timestamp, digest, signature)
+        self._buckets = {}      # (band, band values) -> set of entry ids
+        self._order = deque()   # (timestamp, entry id), oldest first
+        self._next_id = 0
+
+        if self.path and os.path.exists(self.path):
+            self.load()
+
+    @staticmethod
+    def normalize(text):
+        """Normalize Unicode forms, case and whitespace for exact matching
+
+        Punctuation, emoji and links are kept, since tweets that differ only
+        in them are not duplicates; fuzzier matches are left to MinHash.
+        """
+        text = unicodedata.normalize("NFKC", text).casefold()
+        return " ".join(text.split())
+
+    def _digest(self, normalized):
+        return hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+
+    def _signature(self, normalized):
+        """Compute the MinHash signature of the text's character shingles"""
+        k = self.shingle_size
+        if len(normalized) <= k:
+            shingles = {normalized}
+        else:
+            shingles = {normalized[i:i + k] for i in range(len(normalized) - k + 1)}
+
+        hashes = [
+            int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "big")
+            for s in shingles
+        ]
+        return [
+            min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in hashes)
+            for a, b in self._perms
+        ]
+
+    def _band_keys(self, signature):
+        if signature is None:
+            return []
+        r = self.rows
+        return [(band, tuple(signature[band * r:(band + 1) * r])) for band in range(self.bands)]
+
+    def _evict(self, now):
+        """Drop entries that have fallen outside the time window"""
+        cutoff = now - self.window_seconds
+        while self._order and self._order[0][0] < cutoff:
+            _, entry_id = self._order.popleft()
+            entry = self._entries.pop(entry_id, None)
+            if entry is None:
+                continue
+            _, digest, signature = entry
+            if self._exact.get(digest) == entry_id:
+                del self._exact[digest]
+            for key in self._band_keys(signature):
+                bucket = self._buckets.get(key)
+                if bucket is not None:
+                    bucket.discard(entry_id)
+                    if not bucket:
+                        del self._buckets[key]
+
+    def fingerprint(self, text):
+        """Return (digest, signature) for a text, or None if it normalizes to nothing
+
+        The MinHash signature is only computed when near_threshold is set.
+        """
+        normalized = self.normalize(text)
+        if not normalized:
+            return None
+        signature = self._signature(normalized) if self.near_threshold is not None else None
+        return self._digest(normalized), signature
+
+    def check(self, text, now=None):
+        """Check a text against the index
+
+        Returns (reason, similarity) where reason is "exact", "near" or None
+        """
+        return self.check_fingerprint(self.fingerprint(text), now)
+
+    def check_fingerprint(self, fingerprint, now=None):
+        """Check a fingerprint from fingerprint() against the index"""
+        now = time.time() if now is None else now
+        self._evict(now)
+
+        if fingerprint is None:
+            return None, 0.0
+        digest, signature = fingerprint
+        if digest in self._exact:
+            return "exact", 1.0
+        if self.near_threshold is None or signature is None:
+            return None, 0.0
+
+        candidates = set()
+        for key in self._band_keys(signature):
+            candidates.update(self._buckets.get(key, ()))
+
+        best = 0.0
+        for entry_id in candidates:
+            other = self._entries[entry_id][2]
+            matches = sum(1 for x, y in zip(signature, other) if x == y)
+            best = max(best, matches / self.num_perm)
+
+        if best >= self.near_threshold:
+            return "near", best
+        return None, best
+
+    def is_duplicate(self, text, now=None):
+        """Return True if the text matches a recently posted tweet"""
+        return self.check(text, now)[0] is not None
+
+    def add(self, text, now=None):
+        """Record a successfully posted text"""
+        self.add_fingerprint(self.fingerprint(text), now)
+
+    def add_fingerprint(self, fingerprint, now=None):
+        """Record a fingerprint from fingerprint(), e.g. one loaded from storage
+
+        Entries without a signature only take part in exact matching.
+        """
+        now = time.time() if now is None else now
+        self._evict(now)
+
+        if fingerprint is None:
+            return
+        self._insert(now, *fingerprint)
+
+        if self.path:
+            self.save()
+
+    def _insert(self, timestamp, digest, signature):
+        entry_id = self._next_id
+        self._next_id += 1
+
+        self._entries[entry_id] = (timestamp, digest, signature)
+        self._exact[digest] = entry_id
+        self._order.append((timestamp, entry_id))
+        for key in self._band_keys(signature):
+            self._buckets.setdefault(key, set()).add(entry_id)
+
+    def clear(self):
+        """Forget every recorded text"""
+        self._exact.clear()
+        self._entries.clear()
+        self._buckets.clear()
+        self._order.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def save(self):
+        """Write the index to its JSON file"""
+        data = [
+            [timestamp, digest, signature]
+            for timestamp, digest, signature in (self._entries[i] for _, i in self._order if i in self._entries)
+        ]
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"num_perm": self.num_perm, "entries": data}, f)
+        os.replace(tmp_path, self.path)
+
+    def load(self):
+        """Load the index from its JSON file"""
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️  Warning: Could not load dedup index {self.path}: {e}")
+            return
+
+        if data.get("num_perm") != self.num_perm:
+            print(f"⚠️  Warning: Dedup index {self.path} uses different settings, ignoring it")
+            return
+
+        for timestamp, digest, signature in data.get("entries", []):
+            self._insert(timestamp, digest, signature)
+        self._evict(time.time())
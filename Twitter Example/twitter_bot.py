@@ -7,9 +7,10 @@ This script provides functionality to post tweets with text and images using Twi
 import tweepy
 import os
 from datetime import datetime
+from tweet_dedup import TweetDedupIndex
 
 class TwitterBot:
-    def __init__(self):
+    def __init__(self, dedup_index=None):
         """Initialize the Twitter bot with API credentials"""
         # Twitter API credentials
         self.API_KEY = ''
@@ -18,6 +19,9 @@ class TwitterBot:
         self.ACCESS_TOKEN_SECRET = ''
         self.BEARER_TOKEN = ''
         
+        # Local index of recently posted texts, checked before every text tweet
+        self.dedup_index = dedup_index if dedup_index is not None else TweetDedupIndex()
+        
         # Initialize API clients
         self._setup_clients()
     
@@ -62,15 +66,27 @@ class TwitterBot:
             print(f"❌ Authentication failed: {e}")
             return False
     
-    def post_text_tweet(self, text):
-        """Post a text-only tweet"""
+    def fit_text(self, text):
+        """Truncate text to Twitter's 280-character limit"""
+        if len(text) > 280:
+            print(f"⚠️  Warning: Tweet is {len(text)} characters (max 280)")
+            text = text[:277] + "..."
+        return text
+    
+    def post_text_tweet(self, text, allow_duplicate=False):
+        """Post a text-only tweet, skipping recent duplicates unless allow_duplicate is set"""
         try:
-            if len(text) > 280:
-                print(f"⚠️  Warning: Tweet is {len(text)} characters (max 280)")
-                text = text[:277] + "..."
+            text = self.fit_text(text)
+            
+            if not allow_duplicate:
+                reason, similarity = self.dedup_index.check(text)
+                if reason:
+                    print(f"⏭️  Skipping {reason} duplicate tweet (similarity {similarity:.2f}): {text}")
+                    return None
             
             response = self.client.create_tweet(text=text)
             tweet_id = response.data['id']
+            self.dedup_index.add(text)
             
             print(f"✅ Tweet posted successfully!")
             print(f"🔗 Tweet ID: {tweet_id}")
@@ -97,9 +113,7 @@ class TwitterBot:
             media_id = media.media_id
             
             # Post tweet with image using API v2
-            if len(text) > 280:
-                print(f"⚠️  Warning: Tweet is {len(text)} characters (max 280)")
-                text = text[:277] + "..."
+            text = self.fit_text(text)
             
             response = self.client.create_tweet(text=text, media_ids=[media_id])
             tweet_id = response.data['id']
@@ -140,9 +154,7 @@ class TwitterBot:
                 return None
             
             # Post tweet with images
-            if len(text) > 280:
-                print(f"⚠️  Warning: Tweet is {len(text)} characters (max 280)")
-                text = text[:277] + "..."
+            text = self.fit_text(text)
             
             response = self.client.create_tweet(text=text, media_ids=media_ids)
             tweet_id = response.data['id']